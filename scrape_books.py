@@ -25,34 +25,62 @@ What it does
 
 Key features
 ------------
-- **Requests + BeautifulSoup** only (no browser automation).
-- **Pagination** via the "Next" link on the catalogue pages.
-- **Polite scraping**: configurable inter-page delay via `--delay`.
-- **Resilience**: HTTP errors raise early (via `raise_for_status()`).
+- **Requests + lxml** only (no browser automation).
+- **Pagination**: page URLs are computed upfront from `page-N.html` start URLs
+  or read from `/sitemap.xml`; the "Next" link is only followed as a fallback.
+- **Parallel downloads**: `page-N.html` URLs are known upfront, so pages are
+  fetched by a small thread pool (`--workers`) sharing one `requests.Session`
+  whose pool keeps one connection per worker alive for the whole run.
+- **Polite scraping**: configurable delay via `--delay`, enforced across all
+  threads by a shared rate limiter.
+- **Page cache**: ETag / Last-Modified are remembered in `.scrape_cache.json`
+  next to the script; unchanged pages come back as `304 Not Modified` and
+  their rows are reused without re-parsing (disable with `--no-cache`).
+- **Resilience**: dropped connections and `429`/`5xx` answers are retried up
+  to 3 times with backoff; other HTTP errors raise early (via
+  `raise_for_status()`).
 - **Beginner friendly**: minimal, readable code.
 
 How it works (high level)
 -------------------------
-1) `parse_args()` parses command-line flags (pages, max-price, out, delay, start-url).
+1) `parse_args()` parses command-line flags (pages, max-price, out, delay, workers,
+   start-url, sep, no-cache).
 2) `main()`:
-   - Opens the output CSV and writes the header.
    - Starts from `args.start_url` (default: page 1 of the catalogue).
-   - For each page (up to `args.pages`):
-     a) Calls `scrape_one_page(current_url, args.max_price)` to collect rows and
-        discover the next page URL.
-     b) Appends the scraped rows to the CSV.
-     c) Waits `args.delay` seconds before proceeding.
-     d) Stops early if no "Next" link is present.
-3) `scrape_one_page(url, max_price)`:
-   - Downloads `url`, builds a BeautifulSoup tree (`lxml` parser).
-   - Selects all book cards with CSS selector `article.product_pod`.
-   - Extracts `title`, `price_raw`, `stock`, and builds an absolute `url`.
-   - Calls `parse_price(price_raw)` to compute `price_value`.
-   - Applies the optional filter: only appends rows when
+   - `scrape_pages()` picks the strategy: if the URL ends in `page-N.html`,
+     `catalogue_urls()` builds the next `args.pages` URLs upfront and
+     `scrape_concurrent()` downloads them in parallel. For a category index,
+     `sitemap_urls()` first looks for the following `page-N.html` pages in
+     the site's `/sitemap.xml`. Otherwise (e.g. the home page, or without a
+     usable sitemap) the start page is fetched and the page URLs are counted
+     up from its "Next" link; only if that link isn't a `page-N.html` URL does
+     `scrape_serial()` follow "Next" one page at a time.
+   - Either way, every request first waits for a `RateLimiter` slot
+     (one request per `args.delay` seconds).
+   - Opens the output CSV, writes the header, then appends each page's rows
+     in page order, as soon as they arrive (later pages keep downloading
+     meanwhile). `encode_rows()` turns a page into one block of UTF-8
+     bytes, joining plain rows by hand and using `csv` only for rows that
+     need quoting.
+   - Stops early after the last page (no "Next" link).
+   - Saves the page cache (`save_cache()`) unless `--no-cache` was given.
+3) `scrape_one_page(session, url, max_price, cache)`:
+   - Downloads `url`, sending `If-None-Match` / `If-Modified-Since` when the
+     cache has an entry for it; on `304` the cached rows are reused.
+   - Otherwise streams the body into `parse_page(chunks, url)`, which feeds
+     each chunk to an `lxml` HTML parser driving a `BookTarget`: no tree is
+     built; as soon as a book card (`article.product_pod`) closes, its
+     `title`, `price_raw`, `stock` and absolute `url` are appended to one
+     list per column. At the end `parse_price()` turns the `price_raw`
+     column into `price_value` and the columns are zipped into row tuples.
+   - Stores the validators and rows in the cache (unless the server sent
+     `Cache-Control: no-store`).
+   - Applies the optional filter: only keeps rows when
      `max_price is None` **or** `price_value <= max_price`.
    - Returns a tuple `(rows, next_url)`.
 4) `parse_price(raw)`:
-   - Strips non-digit characters except decimal separators.
+   - Fast path: plain `£NN.NN` prices go straight to `float()`.
+   - Otherwise strips non-digit characters except decimal separators.
    - Handles both `,` and `.`; chooses a sensible decimal separator.
    - Returns `float` on success, `None` on failure.
 
@@ -67,8 +95,14 @@ Command-line arguments
     Output CSV filename.
 - `--delay FLOAT` (default: 1.0)
     Seconds to wait between page requests (be polite).
+- `--workers INT` (default: 4)
+    How many pages to download in parallel.
+- `--no-cache`
+    Ignore `.scrape_cache.json` and re-download every page.
 - `--start-url URL`
     Starting URL for the catalogue (defaults to page 1).
+- `--sep CHAR` (default: `;`)
+    CSV delimiter; use `,` for US-style CSV.
 
 Examples
 --------
@@ -92,8 +126,9 @@ Dependencies
   `from typing import Optional` and replace `float | None` with `Optional[float]`.
 - Third-party packages:
   - requests
-  - beautifulsoup4
   - lxml
+  - brotli (optional, not in requirements.txt; once installed, requests
+    also asks for Brotli-compressed pages, ~4x smaller than plain HTML)
 
 Error handling & limitations
 ----------------------------
@@ -128,11 +163,22 @@ Choose a permissive license (e.g., MIT) for educational use in your repository.
 """
 
 import csv
+import io
 import time
 import requests
 import re 
 import argparse
-from bs4 import BeautifulSoup
+import codecs
+import functools
+import hashlib
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from lxml import etree
 from urllib.parse import urljoin
 from pathlib import Path
 
@@ -144,10 +190,23 @@ def parse_args():
                    help="Keep only items with price <= this value (e.g., 30.0). Omit to disable.")
     p.add_argument("--out", default="books.csv", help="Output CSV filename (default: books.csv)")
     p.add_argument("--delay", type=float, default=1.0, help="Delay in seconds between pages (default: 1.0)")
+    p.add_argument("--workers", type=int, default=4,
+                   help="How many pages to download in parallel (default: 4)")
     p.add_argument("--start-url", default="https://books.toscrape.com/catalogue/page-1.html", dest="start_url",
                    help="Start URL (default: page-1 of the catalogue)")
     p.add_argument("--sep", default=";", help="CSV delimiter (default: ';'). Use ',' for US-style CSV.")
-    return p.parse_args() 
+    p.add_argument("--no-cache", action="store_false", dest="use_cache",
+                   help="Ignore the page cache and re-download every page")
+    args = p.parse_args()
+    # csv needs a 1-character delimiter; fail before downloading anything
+    if len(args.sep) != 1:
+        p.error("--sep must be a single character")
+    if args.workers < 1:
+        p.error("--workers must be at least 1")
+    return args
+
+
+_PRICE_STRIP = re.compile(r"[^0-9.,]")
 
 
 def parse_price(raw: str) -> float | None:
@@ -157,13 +216,20 @@ def parse_price(raw: str) -> float | None:
     """
     if not raw:
         return None
+    # fast path: the site always prints '£NN.NN', which float() reads directly
+    if raw[:1] == "£":
+        digits = raw[1:]
+        if digits.isascii() and digits.replace(".", "", 1).isdigit():
+            return float(digits)
     try:
         # keep only digits and decimal separator
-        s = re.sub(r"[^0-9.,]", "", raw)
+        s = _PRICE_STRIP.sub("", raw)
         # Books to Scrape uses '.' as decimal separator
         # if both separators appear, assume last one is decimal
-        if s.count(",") and s.count("."):
-            if s.rfind(",") > s.rfind("."):
+        last_point = s.rfind(".")
+        last_comma = s.rfind(",")
+        if last_point >= 0 and last_comma >= 0:
+            if last_comma > last_point:
                 s = s.replace(".", "").replace(",", ".")
             else:
                 s = s.replace(",", "")
@@ -179,70 +245,431 @@ HEADERS = {
                   "Chrome/124.0.0.0 Safari/537.36"
 }
 
-def scrape_one_page(url: str, max_price: float | None):
-    """Download one page, return (rows, next_url)."""
-    resp = requests.get(url, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    # Feed raw bytes so the parser reads the correct encoding from the HTML
-    soup = BeautifulSoup(resp.content, "lxml")
-
-    rows = []
-    for card in soup.select("article.product_pod"):
-        title = card.h3.a.get("title", "").strip()
-        price = card.select_one(".price_color").get_text(strip=True)
-        # Fix pound sign if mojibake slipped in
-        if "Â£" in price:
-            price = price.replace("Â£", "£")
-        price = price.replace("\xa3", "£")  # ensure U+00A3 is normalized
-        stock = card.select_one(".instock.availability").get_text(strip=True)
-        rel_link = card.h3.a.get("href", "")
-        full_url = urljoin(url, rel_link)
-        price_value = parse_price(price)
-        # apply optional filter
-        if (max_price is None) or (price_value is not None and price_value <= max_price):
-            rows.append([title, price, price_value, stock, full_url])
-
-
-    # find "Next" link
-    next_a = soup.select_one("li.next a")
-    next_url = urljoin(url, next_a["href"]) if next_a else None
+@functools.lru_cache(maxsize=1)
+def _base_dir() -> Path:
+    """Folder where scrape_books.py lives (resolved once; resolve() hits the filesystem)."""
+    return Path(__file__).resolve().parent
+
+
+CACHE_PATH = _base_dir() / ".scrape_cache.json"
+
+
+def load_cache() -> dict:
+    """Load the page cache ({sha1(url): entry}); empty if missing or unreadable."""
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # valid JSON but not a dict (e.g. `[]` or `null`) is just as unusable
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache: dict):
+    with open(CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+def make_session(workers: int) -> requests.Session:
+    """
+    Build the one Session shared by all worker threads. Everything lives on a
+    single host, so a single pool holding one keep-alive connection per worker
+    is enough: each connection is opened once and reused for every later page.
+    Dropped connections and 429/5xx answers are retried with a short backoff.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                    raise_on_status=False)  # the last answer still reaches raise_for_status()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, pool_block=True,
+                          max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads: hands out one request slot
+    every `interval` seconds, so parallel downloads stay as polite as `--delay`.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def scrape_one_page(session: requests.Session, url: str, max_price: float | None,
+                    cache: dict | None = None):
+    """
+    Download one page, return (rows, next_url).
+    With a `cache`, sends a conditional GET (ETag / Last-Modified) and reuses
+    the cached rows when the server answers 304 Not Modified.
+    """
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    entry = cache.get(key) if cache is not None else None
+    if not isinstance(entry, dict) or "rows" not in entry:
+        entry = None  # a malformed entry (hand-edited or old cache file) is a miss
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    # stream=True: parse chunks as they arrive instead of buffering the whole body
+    with session.get(url, headers=headers, timeout=15, stream=True) as resp:
+        if entry and resp.status_code == 304:
+            resp.content  # read the (empty) body so the connection goes back to the pool
+            rows, next_url = entry["rows"], entry.get("next_url")
+        else:
+            resp.raise_for_status()
+            rows, next_url = parse_page(resp.iter_content(8192), url)
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            no_store = "no-store" in resp.headers.get("Cache-Control", "").lower()
+            if cache is not None:
+                if (etag or last_modified) and not no_store:
+                    cache[key] = {"etag": etag, "last_modified": last_modified,
+                                  "rows": rows, "next_url": next_url}
+                else:
+                    cache.pop(key, None)  # don't revalidate against an outdated entry
+
+    # apply optional filter (the cache always keeps every row)
+    if max_price is not None:
+        rows = [r for r in rows if r[2] is not None and r[2] <= max_price]
     return rows, next_url
 
+
+# segments of letters, digits, '_' and '-', dots only inside a segment: no '//',
+# no '.'/'..' segments, no query/fragment, nothing urljoin would rewrite
+_PLAIN_LINK = re.compile(r"[\w-]+(?:\.[\w-]+)*(?:/[\w-]+(?:\.[\w-]+)*)*", re.ASCII)
+
+
+class BookTarget:
+    """
+    lxml parser target: instead of building a tree, receives start/end/data
+    events and turns each `article.product_pod` into a row as soon as it closes.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._base = urljoin(url, ".")  # the page's folder, resolved once per page
+        # one list per column; close() zips them into rows
+        self.titles, self.prices, self.stocks, self.urls = [], [], [], []
+        self.next_url = None
+        self._card = None     # fields of the card being parsed
+        self._field = None    # "price" / "stock" while inside that <p>
+        self._text = []
+        self._in_h3 = False
+        self._in_next = False
+
+    def start(self, tag, attrib):
+        # Called for every tag on the page: branch on the tag name first and
+        # only read `class` on the few tags that can carry one we care about.
+        card = self._card
+        if card is not None:
+            if tag == "a":
+                if self._in_h3:
+                    card["title"] = attrib.get("title", "").strip()
+                    card["href"] = attrib.get("href", "")
+            elif tag == "p":
+                classes = attrib.get("class", "").split()
+                if "price_color" in classes:
+                    self._field, self._text = "price", []
+                elif "instock" in classes:
+                    self._field, self._text = "stock", []
+            elif tag == "h3":
+                self._in_h3 = True
+        elif tag == "article":
+            if "product_pod" in attrib.get("class", "").split():
+                self._card = {}
+        elif tag == "li":
+            if "next" in attrib.get("class", "").split():
+                self._in_next = True
+        elif tag == "a" and self._in_next:
+            self.next_url = self._absolute(attrib.get("href", ""))
+
+    def data(self, text):
+        if self._field:
+            self._text.append(text)
+
+    def end(self, tag):
+        if self._card is None:
+            if tag == "li":
+                self._in_next = False
+        elif tag == "h3":
+            self._in_h3 = False
+        elif tag == "p" and self._field:
+            self._card[self._field] = " ".join("".join(self._text).split())
+            self._field = None
+        elif tag == "article":
+            card = self._card
+            self.titles.append(card.get("title", ""))
+            self.prices.append(card.get("price", ""))
+            self.stocks.append(card.get("stock", ""))
+            self.urls.append(self._absolute(card.get("href", "")))
+            self._card = None
+
+    def _absolute(self, link):
+        # plain relative links ('a-light_1000/index.html') only need the folder in front;
+        # anything else goes through urljoin, which normalises it
+        if _PLAIN_LINK.fullmatch(link):
+            return self._base + link
+        return urljoin(self.url, link)
+
+    def close(self):
+        values = [parse_price(price) for price in self.prices]
+        rows = list(zip(self.titles, self.prices, values, self.stocks, self.urls))
+        return rows, self.next_url
+
+
+def parse_page(chunks, url: str):
+    """Parse one catalogue page from an iterable of byte chunks, return (rows, next_url)."""
+    # The site is UTF-8; saying so upfront means '£' can never come out as 'Â£'
+    parser = etree.HTMLParser(target=BookTarget(url), encoding="utf-8")
+    fed = False
+    for chunk in chunks:
+        parser.feed(chunk)
+        fed = True
+    if not fed:
+        return [], None  # empty body: close() would raise "no element found"
+    return parser.close()
+
 def resolve_output_path(arg_out: str) -> Path:
     """
     Resolve the output path to live inside the script folder if a relative path is given.
     Ensures the parent directory exists.
     """
-    base_dir = Path(__file__).resolve().parent  # folder where scrape_books.py lives
     out = Path(arg_out)
     if not out.is_absolute():
-        out = (base_dir / out.name).resolve()
+        out = (_base_dir() / out.name).resolve()
+    # not cached: a folder deleted while the process runs is simply created again
     out.parent.mkdir(parents=True, exist_ok=True)
     return out
 
 
+_PAGE_URL = re.compile(r"(.+/page-)(\d+)(\.html)$")
+
+
+def catalogue_urls(start_url: str, pages: int) -> list[str] | None:
+    """
+    Build the URLs of `pages` catalogue pages by counting up from 'page-N.html'.
+    Returns None if `start_url` doesn't follow that pattern.
+    """
+    m = _PAGE_URL.match(start_url)
+    if not m:
+        return None
+    prefix, first, suffix = m.group(1), int(m.group(2)), m.group(3)
+    return [f"{prefix}{n}{suffix}" for n in range(first, first + pages)]
+
+
+def sitemap_urls(session: requests.Session, start_url: str, pages: int,
+                 limiter: RateLimiter) -> list[str] | None:
+    """
+    Look up the pages that follow `start_url` (e.g. a category's 'index.html') in
+    the site's /sitemap.xml: the 'page-N.html' entries in the same folder, in order.
+    Only an unbroken run page-2, page-3, ... is trusted; if it is shorter than
+    `pages - 1`, the remaining URLs are counted up from its last page.
+    Returns `start_url` plus `pages - 1` page URLs, or None if there's no
+    usable sitemap. This only helps category index pages: the home page's
+    follow-ups live in 'catalogue/', not its own folder, so for a start URL in
+    the site root the sitemap isn't requested at all.
+    """
+    prefix = urljoin(start_url, "page-")
+    if urljoin(start_url, "/page-") == prefix:
+        return None  # site root: its "Next" link leads elsewhere
+    limiter.wait()
+    try:
+        resp = session.get(urljoin(start_url, "/sitemap.xml"), timeout=15)
+        if resp.status_code != 200:
+            return None
+        root = etree.fromstring(resp.content)
+    except (requests.RequestException, etree.XMLSyntaxError):
+        return None
+
+    numbered = {}  # page number -> URL, so a repeated <loc> is only scraped once
+    for loc in root.iter("{*}loc"):
+        m = _PAGE_URL.match((loc.text or "").strip())
+        # page-1.html is the start page itself (e.g. index.html): don't scrape it twice
+        if m and m.group(1) == prefix and int(m.group(2)) >= 2 and m.group(0) != start_url:
+            numbered[int(m.group(2))] = m.group(0)
+
+    # stop at the first gap: a page missing from the sitemap must not be skipped
+    urls = [start_url]
+    n = 2
+    while n in numbered and len(urls) < pages:
+        urls.append(numbered[n])
+        n += 1
+    if len(urls) == 1:
+        return None
+    if len(urls) < pages:
+        # a partial sitemap isn't the end of the catalogue: scrape_concurrent()
+        # still stops at the real last page (no "Next" link, or a 404)
+        urls += catalogue_urls(urls[-1], pages - len(urls) + 1)[1:]
+    return urls
+
+
+def scrape_pages(session: requests.Session, start_url: str, pages: int, max_price: float | None,
+                 limiter: RateLimiter, workers: int, cache: dict | None = None):
+    """
+    Yield each page's rows, in page order. Page URLs are computed upfront whenever
+    possible (from the URL itself, else from the sitemap) so they can all be
+    fetched at once; the "Next" link is only followed when neither works.
+    """
+    if pages < 1:
+        return
+    urls = catalogue_urls(start_url, pages)
+    if urls is None and pages > 1:
+        urls = sitemap_urls(session, start_url, pages, limiter)
+    if urls is None:
+        # e.g. the home page or a category index: fetch it, then count up from its "Next" link
+        limiter.wait()
+        rows, next_url = scrape_one_page(session, start_url, max_price, cache)
+        yield rows
+        if not next_url or pages == 1:
+            return
+        urls = catalogue_urls(next_url, pages - 1)
+        if urls is None:
+            yield from scrape_serial(session, next_url, pages - 1, max_price, limiter, cache)
+            return
+    yield from scrape_concurrent(session, urls, max_price, limiter, workers, cache)
+
+
+def scrape_serial(session: requests.Session, start_url: str, pages: int, max_price: float | None,
+                  limiter: RateLimiter, cache: dict | None = None):
+    """Follow the "Next" links one page at a time, yielding each page's rows."""
+    current = start_url
+    for _ in range(pages):
+        limiter.wait()
+        rows, next_url = scrape_one_page(session, current, max_price, cache)
+        yield rows
+        if not next_url:
+            break
+        current = next_url
+
+
+def scrape_concurrent(session: requests.Session, urls: list[str], max_price: float | None,
+                      limiter: RateLimiter, workers: int, cache: dict | None = None):
+    """
+    Download `urls` with a thread pool and yield each page's rows in page order.
+    Pages are handed to the caller (the CSV writer) as soon as they and all
+    earlier pages are done, while later pages are still downloading. At most
+    2 * `workers` pages are in flight, so a slow writer holds back the
+    downloads instead of letting finished pages pile up in memory.
+    Stops after the last catalogue page (no "Next" link, or a 404 past the end).
+    """
+    last_page = len(urls)  # index of the last catalogue page, once known
+    lock = threading.Lock()
+
+    def mark_last(i):
+        nonlocal last_page
+        with lock:
+            last_page = min(last_page, i)
+
+    def past_end(i):
+        # only pages the consumer never reaches are skipped: it stops at last_page
+        return i > last_page
+
+    def fetch(i, url):
+        # skip pages behind the last one, also when we were waiting for a slot
+        if past_end(i):
+            return None
+        limiter.wait()
+        if past_end(i):
+            return None
+        try:
+            rows, next_url = scrape_one_page(session, url, max_price, cache)
+        except requests.HTTPError as e:
+            if i > 0 and e.response is not None and e.response.status_code == 404:
+                mark_last(i - 1)
+            raise
+        if not next_url:
+            mark_last(i)
+        return rows, next_url
+
+    todo = enumerate(urls)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(fetch, i, url) for i, url in islice(todo, 2 * workers))
+        try:
+            for i in range(len(urls)):
+                try:
+                    rows, next_url = pending.popleft().result()
+                except requests.HTTPError as e:
+                    # a 404 after page one just means we asked for more pages than exist
+                    if i == 0 or e.response is None or e.response.status_code != 404:
+                        raise
+                    break
+                nxt = next(todo, None)
+                if nxt is not None:
+                    pending.append(pool.submit(fetch, *nxt))
+                yield rows
+                if not next_url:
+                    break
+        finally:
+            for fut in pending:
+                fut.cancel()  # pages past the end (or after an error) that haven't started
+
+
+CSV_COLUMNS = ("title", "price_raw", "price_value", "stock", "url")
+
+
+def encode_rows(rows, sep: str) -> bytes:
+    """
+    Encode (title, price_raw, price_value, stock, url) rows as UTF-8 CSV lines,
+    exactly as csv.writer would write them. `rows` can be any iterable.
+    Rows that need no quoting (nearly all of them) are joined by hand; a row
+    with the delimiter, a quote or a line break in a field goes through csv.
+    """
+    lines = []
+    append = lines.append
+    for title, price, value, stock, url in rows:
+        # only price_value isn't a str already; no per-row list is built
+        fields = (title, price, "" if value is None else str(value), stock, url)
+        line = sep.join(fields)
+        if line.count(sep) != 4 or '"' in line or "\n" in line or "\r" in line:
+            buf = io.StringIO()
+            csv.writer(buf, delimiter=sep).writerow(fields)
+            line = buf.getvalue()[:-2]  # drop csv's "\r\n", added back below
+        append(line)
+    append("")
+    return "\r\n".join(lines).encode("utf-8")
+
+
 def main():
     args = parse_args()
 
     total = 0
-    current = args.start_url
+    limiter = RateLimiter(args.delay)
+    cache = load_cache() if args.use_cache else None
+    session = make_session(args.workers)
+    pages = scrape_pages(session, args.start_url, args.pages, args.max_price, limiter,
+                         args.workers, cache)
 
     out_path = resolve_output_path(args.out)  # <— ensures saving in simple-scraper
-    with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f, delimiter=args.sep)  # ';' by default (Excel-friendly)
-        writer.writerow(["title", "price_raw", "price_value", "stock", "url"])
-
-        for page_num in range(1, args.pages + 1):
-            rows, next_url = scrape_one_page(current, args.max_price)
-            writer.writerows(rows)
+    # 1 MiB buffer: rows reach the disk in a few large writes, not one per page
+    with session, open(out_path, "wb", buffering=1 << 20) as f:
+        f.write(codecs.BOM_UTF8)  # lets Excel detect UTF-8
+        # ';' by default (Excel-friendly); goes through the same quoting check
+        # as the rows, e.g. `--sep _` must quote "price_raw"
+        f.write(encode_rows([CSV_COLUMNS], args.sep))
+
+        for page_num, rows in enumerate(pages, start=1):
+            f.write(encode_rows(rows, args.sep))
             total += len(rows)
             print(f"Page {page_num}: {len(rows)} rows")
 
-            if not next_url:
-                break
-            time.sleep(args.delay)
-            current = next_url
-
+    if cache is not None:
+        save_cache(cache)
     print(f"Saved {total} rows to {out_path}")
 
 if __name__ == "__main__":
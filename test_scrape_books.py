@@ -0,0 +1,264 @@
+import csv
+import hashlib
+import io
+import random
+import time
+from urllib.parse import urljoin
+
+import pytest
+import requests
+
+import scrape_books
+from scrape_books import (CSV_COLUMNS, BookTarget, RateLimiter, catalogue_urls, encode_rows,
+                          load_cache, parse_page, parse_price, scrape_concurrent, scrape_one_page,
+                          sitemap_urls)
+
+PAGES = [
+    "https://books.toscrape.com/catalogue/page-1.html",
+    "https://books.toscrape.com/",
+    "https://books.toscrape.com",
+    "https://books.toscrape.com/catalogue/category/books/travel_2/index.html?q=a/b",
+]
+LINKS = [
+    "a-light-in-the-attic_1000/index.html", "page-2.html", "",
+    "../../../b.html", "/c.html", "https://example.com/z", "mailto:a@b", "?p=2", "#f",
+    "a/./b", "a/../../b", "a/.", "a/..", " a.html", "a.html ", "a\tb.html", "a\nb.html",
+    "a//b.html", "a.html?", "a.html#", "x//", "x/", "a..b/c.html", "a./b", "é.html", "a b.html",
+]
+
+
+@pytest.mark.parametrize("page", PAGES)
+@pytest.mark.parametrize("link", LINKS)
+def test_absolute_matches_urljoin(page, link):
+    assert BookTarget(page)._absolute(link) == urljoin(page, link)
+
+
+# UTF-8 bytes with no charset declared anywhere: only encoding="utf-8" in
+# parse_page() keeps '£' from being read as Latin-1 ('Â£')
+NO_CHARSET_PAGE = """<html><head><title>All products</title></head><body><ol class="row"><li>
+<article class="product_pod">
+    <h3><a href="a-light-in-the-attic_1000/index.html" title="A Light in the Attic">A Light in the ...</a></h3>
+    <div class="product_price">
+        <p class="price_color">£51.77</p>
+        <p class="instock availability"><i class="icon-ok"></i> In stock</p>
+    </div>
+</article>
+</li></ol></body></html>""".encode("utf-8")
+
+
+def test_parse_page_decodes_utf8_without_charset():
+    rows, next_url = parse_page([NO_CHARSET_PAGE], "https://books.toscrape.com/catalogue/page-1.html")
+    assert rows[0][1].startswith("£")
+    assert rows[0][2] == 51.77
+    assert next_url is None
+
+
+@pytest.mark.parametrize("chunks", [[], [b""], [b" \n"]])
+def test_parse_page_empty_body(chunks):
+    assert parse_page(chunks, "https://books.toscrape.com/catalogue/page-1.html") == ([], None)
+
+
+def test_scrape_one_page_unexpected_304_is_empty():
+    # a 304 we didn't ask for (no cache entry) falls through to parse_page()
+    assert scrape_one_page(FakeSession(FakeResponse(304)), PAGE_1, None) == ([], None)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("£51.77", 51.77),
+    ("£51", 51.0),
+    ("Â£51.77", 51.77),    # mojibake prefix: no fast path, same result
+    ("£1,234.50", 1234.5),
+    ("£1.234,50", 1234.5),
+    ("£.5", 0.5),
+    ("£5..1", None),
+    ("£51.77 ", 51.77),
+    ("£", None),
+    ("£١٢", None),         # non-ASCII digits: float() would accept them, the baseline didn't
+    ("", None),
+    (None, None),
+])
+def test_parse_price(raw, expected):
+    assert parse_price(raw) == expected
+
+
+CATEGORY = "https://books.toscrape.com/catalogue/category/books/travel_2/"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        return [self.content[i:i + chunk_size] for i in range(0, len(self.content), chunk_size)]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(response=self)
+
+
+class FakeSession:
+    """Answers every GET with the next canned response and records the requests."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, headers or {}))
+        return self.responses.pop(0)
+
+
+def sitemap(*pages):
+    locs = "".join(f"<url><loc>{CATEGORY}page-{n}.html</loc></url>" for n in pages)
+    return FakeResponse(content=(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+    ).encode("utf-8"))
+
+
+@pytest.mark.parametrize("listed, expected", [
+    ((2, 3, 4), [2, 3, 4]),
+    ((4, 2, 3, 5, 6), [2, 3, 4]),  # out of order, longer than needed
+    ((2, 4), [2, 3, 4]),           # gap: page-3 is counted up, not skipped
+    ((2, 3, 3, 2), [2, 3, 4]),     # duplicates: each page once
+    ((2,), [2, 3, 4]),             # short sitemap: the rest is counted up
+])
+def test_sitemap_urls(listed, expected):
+    start = CATEGORY + "index.html"
+    urls = sitemap_urls(FakeSession(sitemap(*listed)), start, 4, RateLimiter(0))
+    assert urls == [start] + [f"{CATEGORY}page-{n}.html" for n in expected]
+
+
+@pytest.mark.parametrize("response", [sitemap(), sitemap(3, 4), FakeResponse(404), FakeResponse(content=b"<oops")])
+def test_sitemap_urls_unusable(response):
+    assert sitemap_urls(FakeSession(response), CATEGORY + "index.html", 4, RateLimiter(0)) is None
+
+
+@pytest.mark.parametrize("start", ["https://books.toscrape.com/", "https://books.toscrape.com",
+                                   "https://books.toscrape.com/index.html"])
+def test_sitemap_urls_skips_site_root(start):
+    session = FakeSession()
+    assert sitemap_urls(session, start, 4, RateLimiter(0)) is None
+    assert session.requests == []
+
+
+def fake_catalogue(monkeypatch, last, end="next", delay=0.0):
+    """
+    Stub scrape_one_page() with a `last`-page catalogue whose end is marked by a
+    missing "Next" link (end="next") or by a 404 for the page after it (end="404").
+    """
+    def scrape_one_page(session, url, max_price, cache=None):
+        time.sleep(random.random() * delay)
+        n = int(url.rsplit("-", 1)[1].split(".")[0])
+        if n > last and end == "404":
+            resp = requests.Response()
+            resp.status_code = 404
+            raise requests.HTTPError(response=resp)
+        next_url = f"page-{n + 1}.html" if n < last or end == "404" else None
+        return [(n,)], next_url
+
+    monkeypatch.setattr(scrape_books, "scrape_one_page", scrape_one_page)
+
+
+def scraped(urls, workers):
+    return [rows[0][0] for rows in scrape_concurrent(None, urls, None, RateLimiter(0), workers)]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 4])
+@pytest.mark.parametrize("end", ["next", "404"])
+@pytest.mark.parametrize("last", [1, 2, 5])
+def test_scrape_concurrent_stops_at_last_page(monkeypatch, workers, end, last):
+    fake_catalogue(monkeypatch, last, end)
+    assert scraped(catalogue_urls(CATEGORY + "page-1.html", 10), workers) == list(range(1, last + 1))
+
+
+def test_scrape_concurrent_404_on_first_page_raises(monkeypatch):
+    fake_catalogue(monkeypatch, 0, "404")
+    with pytest.raises(requests.HTTPError):
+        scraped(catalogue_urls(CATEGORY + "page-1.html", 3), 2)
+
+
+@pytest.mark.parametrize("end", ["next", "404"])
+def test_scrape_concurrent_keeps_page_order(monkeypatch, end):
+    random.seed(0)
+    fake_catalogue(monkeypatch, 12, end, delay=0.005)
+    assert scraped(catalogue_urls(CATEGORY + "page-1.html", 15), 4) == list(range(1, 13))
+
+
+ROW = ("A Light in the Attic", "£51.77", 51.77, "In stock", "https://books.toscrape.com/a_1/index.html")
+ROWS = [
+    ROW,
+    CSV_COLUMNS,
+    ROW[:2] + (None,) + ROW[3:],
+    ('Say "hi"',) + ROW[1:],
+    ("line\nbreak", "cr\rhere", 1.5, "crlf\r\nend", "x"),
+    ("a;b,c d_e.f", "£1,234.50", 1234.5, " padded ", "u"),
+    ("", "", None, "", ""),
+]
+
+
+@pytest.mark.parametrize("sep", [";", ",", " ", "_", "e", "."])
+@pytest.mark.parametrize("row", ROWS)
+def test_encode_rows_matches_csv_writer(row, sep):
+    buf = io.StringIO()
+    csv.writer(buf, delimiter=sep).writerow(row)
+    assert encode_rows([row], sep) == buf.getvalue().encode("utf-8")
+
+
+CARD = """<article class="product_pod"><h3><a href="{0}_1/index.html" title="{0}">{0}</a></h3>
+<p class="price_color">£{1}</p><p class="instock availability">In stock</p></article>"""
+CACHED_PAGE = ("<html><body>" + CARD.format("Cheap", "10.00") + CARD.format("Dear", "51.77")
+               + '<li class="next"><a href="page-2.html">next</a></li></body></html>').encode("utf-8")
+PAGE_1 = "https://books.toscrape.com/catalogue/page-1.html"
+
+
+def test_scrape_one_page_reuses_rows_on_304():
+    cache = {}
+    session = FakeSession(FakeResponse(200, CACHED_PAGE, {"ETag": '"v1"'}), FakeResponse(304))
+    first = scrape_one_page(session, PAGE_1, None, cache)
+    # the cache keeps every row; --max-price still applies to the rows from a 304
+    rows, next_url = scrape_one_page(session, PAGE_1, 20.0, cache)
+    assert session.requests[1][1] == {"If-None-Match": '"v1"'}
+    assert [r[0] for r in first[0]] == ["Cheap", "Dear"]
+    assert [r[0] for r in rows] == ["Cheap"]
+    assert next_url == first[1] == "https://books.toscrape.com/catalogue/page-2.html"
+
+
+@pytest.mark.parametrize("headers", [{"ETag": '"v2"', "Cache-Control": "No-Store"}, {}])
+def test_scrape_one_page_drops_uncacheable_entry(headers):
+    cache = {}
+    session = FakeSession(FakeResponse(200, CACHED_PAGE, {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+                          FakeResponse(200, CACHED_PAGE, headers))
+    scrape_one_page(session, PAGE_1, None, cache)
+    assert len(cache) == 1
+    scrape_one_page(session, PAGE_1, None, cache)
+    assert session.requests[1][1] == {"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert cache == {}
+
+
+@pytest.mark.parametrize("entry", [{"etag": '"v1"'}, "junk", None])
+def test_scrape_one_page_malformed_entry_is_a_miss(entry):
+    key = hashlib.sha1(PAGE_1.encode("utf-8")).hexdigest()
+    cache = {key: entry}
+    session = FakeSession(FakeResponse(200, CACHED_PAGE, {"ETag": '"v1"'}))
+    rows, _ = scrape_one_page(session, PAGE_1, None, cache)
+    assert session.requests[0][1] == {}
+    assert len(rows) == 2
+    assert cache[key]["etag"] == '"v1"'
+
+
+@pytest.mark.parametrize("content", ["[]", "null", '"junk"', "{not json", None])
+def test_load_cache_falls_back_to_empty_dict(monkeypatch, tmp_path, content):
+    path = tmp_path / ".scrape_cache.json"
+    if content is not None:
+        path.write_text(content, encoding="utf-8")
+    monkeypatch.setattr(scrape_books, "CACHE_PATH", path)
+    assert load_cache() == {}